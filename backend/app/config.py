@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from functools import cached_property
 from typing import List
 import os
 import json
@@ -16,15 +17,18 @@ class Settings(BaseSettings):
     # CORS
     cors_origins: str = '["http://localhost:3000", "http://127.0.0.1:3000"]'
     
-    @property
+    @cached_property
     def cors_origins_list(self) -> List[str]:
-        """Parse CORS origins string to list"""
+        """Parse CORS origins string to list (parsed once per instance)"""
         try:
             return json.loads(self.cors_origins)
         except (json.JSONDecodeError, TypeError):
             # Fallback to default if parsing fails
             return ["http://localhost:3000", "http://127.0.0.1:3000"]
     
+    # Rendered get_post responses kept in memory; 0 disables the cache
+    post_cache_size: int = 1024
+    
     # Application
     debug: bool = True
     environment: str = "development"
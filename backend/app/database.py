@@ -11,7 +11,7 @@ class DummyDB:
     def close(self):
         pass
 
-def get_db():
+async def get_db():
     """Dependency to get dummy database session"""
     db = DummyDB()
     try:
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -18,4 +18,9 @@ class Post(Base):
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Relationship
-    author = relationship("User", back_populates="posts") 
\ No newline at end of file
+    author = relationship("User", back_populates="posts")
+    
+    # Supports keyset pagination over published posts
+    __table_args__ = (
+        Index("ix_posts_pub_created_id", "is_published", "created_at", "id"),
+    ) 
\ No newline at end of file
@@ -1,57 +1,86 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
 from fastapi.security import OAuth2PasswordRequestForm
 from ..database import get_db
 from ..schemas.user import UserCreate, UserResponse, Token
 from ..utils.auth import get_password_hash, verify_password, create_access_token
+from ..utils.prefer import prefer_minimal
+from ..utils.body import json_body, openapi_body
 from ..config import settings
-from ..storage import users
+from ..storage import users, usernames, now_iso
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
-@router.post("/signup", response_model=UserResponse)
-def signup(user: UserCreate, db=Depends(get_db)):
-    """Register a new user"""
+
+def _check_available(email: str, username: str):
+    """Raise if the email or username already belongs to a user"""
     # Check if user already exists
-    if user.email in users:
+    if email in users:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     # Check if username already exists
-    for existing_user in users.values():
-        if existing_user["username"] == user.username:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already taken"
-            )
+    if username in usernames:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already taken"
+        )
+
+
+@router.post("/signup", response_model=UserResponse, openapi_extra=openapi_body(UserCreate))
+async def signup(
+    user: UserCreate = Depends(json_body(UserCreate)),
+    minimal: bool = Depends(prefer_minimal),
+    db=Depends(get_db)
+):
+    """Register a new user"""
+    # Reject duplicates before paying for the hash
+    _check_available(user.email, user.username)
+    
+    # Hash off the event loop, then check again: another signup may have
+    # taken the email or username meanwhile. Nothing awaits between the
+    # second check and the insert.
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
+    _check_available(user.email, user.username)
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
     user_id = len(users) + 1
     
+    timestamp = now_iso()
     user_data = {
         "id": user_id,
         "email": user.email,
         "username": user.username,
         "hashed_password": hashed_password,
         "is_active": True,
-        "created_at": "2023-01-01T00:00:00",
-        "updated_at": "2023-01-01T00:00:00"
+        "created_at": timestamp,
+        "updated_at": timestamp
     }
     
     users[user.email] = user_data
+    usernames[user.username] = user.email
+    
+    if minimal:
+        return Response(
+            status_code=status.HTTP_201_CREATED,
+            headers={"Preference-Applied": "return=minimal"}
+        )
     
     return user_data
 
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_db)):
     """Authenticate user and return access token"""
     # Find user by email
     user = users.get(form_data.username)
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    if not user or not await run_in_threadpool(
+        verify_password, form_data.password, user["hashed_password"]
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
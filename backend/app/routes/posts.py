@@ -1,63 +1,83 @@
+from bisect import bisect_left, bisect_right, insort
 from typing import List, Optional
+import msgspec
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Form
+from fastapi.responses import ORJSONResponse, Response
+from ..config import settings
 from ..database import get_db
-from ..schemas.post import PostCreate, PostUpdate, PostResponse, PostList
+from ..schemas.post import PostCreate, PostCreateMsg, PostUpdate, PostResponse, PostList
 from ..utils.auth import get_current_active_user
-from ..storage import posts, post_id_counter
+from ..utils.prefer import prefer_minimal
+from ..utils.body import json_body, msgspec_body, openapi_body
+from ..storage import posts, published_ids, post_bodies, add_post, now_iso
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
+
+def _unindex(post_id: int):
+    """Drop a post id from the sorted published index, if it is there"""
+    i = bisect_left(published_ids, post_id)
+    if i < len(published_ids) and published_ids[i] == post_id:
+        del published_ids[i]
+
+
 @router.get("/", response_model=PostList)
-def get_posts(
+async def get_posts(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    after_id: Optional[int] = Query(None, ge=0),
     db=Depends(get_db)
 ):
-    """Get all published posts with pagination"""
-    # Filter published posts
-    published_posts = [post for post in posts.values() if post["is_published"]]
-    total = len(published_posts)
-    
-    # Apply pagination
-    paginated_posts = published_posts[skip:skip+limit]
-    
-    return PostList(
-        posts=paginated_posts,
-        total=total,
-        page=skip // limit + 1 if limit > 0 else 1,
-        per_page=limit
-    )
+    """Get all published posts with offset or keyset (after_id) pagination"""
+    # Seek straight past the cursor in the sorted id index
+    start = skip if after_id is None else bisect_right(published_ids, after_id) + skip
+    paginated_posts = [posts[post_id] for post_id in published_ids[start:start + limit]]
+    total = len(published_ids)
+    
+    # Stored posts are already in response shape, so skip re-validation
+    return ORJSONResponse({
+        "posts": paginated_posts,
+        "total": total,
+        "page": skip // limit + 1,
+        "per_page": limit,
+        "next_cursor": paginated_posts[-1]["id"] if len(paginated_posts) == limit else None
+    })
 
 
-@router.post("/", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
-def create_post(
-    post: PostCreate,
+@router.post(
+    "/",
+    response_model=PostResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=openapi_body(PostCreate)
+)
+async def create_post(
+    # Authenticate before the body is read
     current_user: dict = Depends(get_current_active_user),
+    post: PostCreateMsg = Depends(msgspec_body(PostCreateMsg)),
+    minimal: bool = Depends(prefer_minimal),
     db=Depends(get_db)
 ):
     """Create a new post (authenticated users only)"""
-    global post_id_counter
-    post_id_counter += 1
-    
-    post_data = post.dict()
-    post_data["id"] = post_id_counter
-    post_data["author_id"] = current_user["id"]
-    post_data["author"] = {
-        "id": current_user["id"],
-        "username": current_user["username"],
-        "email": current_user["email"]
-    }
-    post_data["created_at"] = "2023-01-01T00:00:00"
-    post_data["updated_at"] = "2023-01-01T00:00:00"
-    
-    posts[post_id_counter] = post_data
-    
-    return post_data
+    post_data = add_post(msgspec.structs.asdict(post), current_user)
+    
+    if minimal:
+        return ORJSONResponse(
+            {"id": post_data["id"]},
+            status_code=status.HTTP_201_CREATED,
+            headers={"Preference-Applied": "return=minimal"}
+        )
+    
+    return ORJSONResponse(post_data, status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/{post_id}", response_model=PostResponse)
-def get_post(post_id: int, db=Depends(get_db)):
+async def get_post(post_id: int, db=Depends(get_db)):
     """Get a specific post by ID"""
+    body = post_bodies.get(post_id)
+    if body is not None:
+        return Response(body, media_type="application/json")
+    
     post = posts.get(post_id)
     
     if not post or not post["is_published"]:
@@ -66,25 +86,34 @@ def get_post(post_id: int, db=Depends(get_db)):
             detail="Post not found"
         )
     
-    return post
+    body = orjson.dumps(post)
+    if settings.post_cache_size > 0:
+        # Evict the oldest entry once the cache is full
+        if len(post_bodies) >= settings.post_cache_size:
+            del post_bodies[next(iter(post_bodies))]
+        post_bodies[post_id] = body
+    
+    return Response(body, media_type="application/json")
 
 
-@router.put("/{post_id}", response_model=PostResponse)
-def update_post(
+@router.put("/{post_id}", response_model=PostResponse, openapi_extra=openapi_body(PostUpdate))
+async def update_post(
     post_id: int,
-    post_update: PostUpdate,
+    # Authenticate before the body is read
     current_user: dict = Depends(get_current_active_user),
+    post_update: PostUpdate = Depends(json_body(PostUpdate)),
+    minimal: bool = Depends(prefer_minimal),
     db=Depends(get_db)
 ):
     """Update a post (only the author can update)"""
-    if post_id not in posts:
+    post = posts.get(post_id)
+    
+    if post is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found"
         )
     
-    post = posts[post_id]
-    
     if post["author_id"] != current_user["id"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -93,29 +122,41 @@ def update_post(
     
     # Update only provided fields
     update_data = post_update.dict(exclude_unset=True)
+    post_bodies.pop(post_id, None)
+    if "is_published" in update_data and update_data["is_published"] != post["is_published"]:
+        if update_data["is_published"]:
+            insort(published_ids, post_id)
+        else:
+            _unindex(post_id)
     for field, value in update_data.items():
         post[field] = value
     
-    post["updated_at"] = "2023-01-01T00:00:00"
+    post["updated_at"] = now_iso()
+    
+    if minimal:
+        return Response(
+            status_code=status.HTTP_204_NO_CONTENT,
+            headers={"Preference-Applied": "return=minimal"}
+        )
     
-    return post
+    return ORJSONResponse(post)
 
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_post(
+async def delete_post(
     post_id: int,
     current_user: dict = Depends(get_current_active_user),
     db=Depends(get_db)
 ):
     """Delete a post (only the author can delete)"""
-    if post_id not in posts:
+    post = posts.get(post_id)
+    
+    if post is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found"
         )
     
-    post = posts[post_id]
-    
     if post["author_id"] != current_user["id"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -123,5 +164,8 @@ def delete_post(
         )
     
     del posts[post_id]
+    post_bodies.pop(post_id, None)
+    if post["is_published"]:
+        _unindex(post_id)
     
     return None
\ No newline at end of file
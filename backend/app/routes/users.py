@@ -1,25 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from ..database import get_db
-from ..schemas.user import UserResponse, UserUpdate
-from ..utils.auth import get_current_active_user, get_password_hash
-from ..storage import users  # Import the in-memory users dictionary
+from ..schemas.user import UserResponse, UserUpdate, UserUpdateResponse
+from ..utils.auth import get_current_active_user, get_password_hash, create_access_token
+from ..storage import users, usernames, public_user  # Import the in-memory user dictionaries
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
-@router.get("/me", response_model=UserResponse)
-def get_current_user_profile(current_user: dict = Depends(get_current_active_user)):
-    """Get current user profile"""
-    return current_user
-
-
-@router.put("/me", response_model=UserResponse)
-def update_current_user_profile(
-    user_update: UserUpdate,
-    current_user: dict = Depends(get_current_active_user),
-    db=Depends(get_db)
-):
-    """Update current user profile"""
+def _check_available(user_update: UserUpdate, current_user: dict):
+    """Raise if the new email or username already belongs to another user"""
     # Check if email is being changed and if it's already taken
     if user_update.email and user_update.email != current_user["email"]:
         if user_update.email in users:
@@ -30,28 +21,59 @@ def update_current_user_profile(
     
     # Check if username is being changed and if it's already taken
     if user_update.username and user_update.username != current_user["username"]:
-        for existing_user in users.values():
-            if existing_user["username"] == user_update.username:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Username already taken"
-                )
-    
+        if user_update.username in usernames:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username already taken"
+            )
+
+
+@router.get("/me", response_model=UserResponse)
+async def get_current_user_profile(current_user: dict = Depends(get_current_active_user)):
+    """Get current user profile"""
+    return ORJSONResponse(public_user(current_user))
+
+
+@router.put("/me", response_model=UserUpdateResponse)
+async def update_current_user_profile(
+    user_update: UserUpdate,
+    current_user: dict = Depends(get_current_active_user),
+    db=Depends(get_db)
+):
+    """Update current user profile"""
     # Update user fields
     update_data = user_update.dict(exclude_unset=True)
     
-    # Hash password if it's being updated
+    # Reject taken emails and usernames before paying for a password hash
+    _check_available(user_update, current_user)
+    
+    # Hash password if it's being updated, off the event loop; then check
+    # again, as another request may have taken the email or username
+    # meanwhile. Nothing awaits between the second check and the update.
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await run_in_threadpool(
+            get_password_hash, update_data.pop("password")
+        )
+        _check_available(user_update, current_user)
+    
+    old_email = current_user["email"]
+    old_username = current_user["username"]
     
     # Update the user in the in-memory dictionary
     for field, value in update_data.items():
         current_user[field] = value
     
     # If email is changed, update the dictionary key
-    if "email" in update_data and update_data["email"] != current_user["email"]:
-        old_email = current_user["email"]
-        users[update_data["email"]] = current_user
+    access_token = None
+    if current_user["email"] != old_email:
+        users[current_user["email"]] = current_user
         del users[old_email]
+        # The caller's token names the old email, so hand back one for the new
+        access_token = create_access_token({"sub": current_user["email"]})
+    
+    # Keep the username index pointing at the current email
+    if current_user["username"] != old_username:
+        del usernames[old_username]
+    usernames[current_user["username"]] = current_user["email"]
     
-    return current_user
\ No newline at end of file
+    return {**current_user, "access_token": access_token}
\ No newline at end of file
@@ -1,7 +1,7 @@
-from .user import UserCreate, UserLogin, UserResponse, UserUpdate
-from .post import PostCreate, PostUpdate, PostResponse, PostList
+from .user import UserCreate, UserLogin, UserResponse, UserUpdate, UserUpdateResponse
+from .post import PostCreate, PostCreateMsg, PostUpdate, PostResponse, PostList
 
 __all__ = [
-    "UserCreate", "UserLogin", "UserResponse", "UserUpdate",
-    "PostCreate", "PostUpdate", "PostResponse", "PostList"
+    "UserCreate", "UserLogin", "UserResponse", "UserUpdate", "UserUpdateResponse",
+    "PostCreate", "PostCreateMsg", "PostUpdate", "PostResponse", "PostList"
 ] 
\ No newline at end of file
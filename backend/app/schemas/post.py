@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+import msgspec
+from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, Optional, List
 from datetime import datetime
 from .user import UserResponse
 
@@ -14,11 +15,26 @@ class PostCreate(PostBase):
     pass
 
 
+class PostCreateMsg(msgspec.Struct):
+    """msgspec mirror of PostCreate, decoded in a single pass on the create path"""
+    title: Annotated[str, msgspec.Meta(min_length=3, max_length=255)]
+    content: Annotated[str, msgspec.Meta(min_length=10)]
+    is_published: bool = True
+
+
 class PostUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=3, max_length=255)
     content: Optional[str] = Field(None, min_length=10)
     is_published: Optional[bool] = None
 
+    @field_validator("title", "content", "is_published")
+    @classmethod
+    def not_null(cls, value):
+        """Fields may be left out of an update, but not set to null"""
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
 
 class PostResponse(PostBase):
     id: int
@@ -35,4 +51,5 @@ class PostList(BaseModel):
     posts: List[PostResponse]
     total: int
     page: int
-    per_page: int 
\ No newline at end of file
+    per_page: int
+    next_cursor: Optional[int] = None 
\ No newline at end of file
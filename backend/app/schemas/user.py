@@ -33,6 +33,11 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class UserUpdateResponse(UserResponse):
+    # Tokens are issued for the email, so an email change comes with a new one
+    access_token: Optional[str] = None
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
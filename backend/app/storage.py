@@ -1,8 +1,62 @@
 # In-memory storage for users and posts
+import asyncio
+from datetime import datetime
 
 # Users storage: email -> user_data
 users = {}
 
+# Username index: username -> email
+usernames = {}
+
 # Posts storage: post_id -> post_data
 posts = {}
-post_id_counter = 0
\ No newline at end of file
+post_id_counter = 0
+
+# Ids of published posts, kept in ascending order
+published_ids = []
+
+# Rendered JSON of published posts: post_id -> bytes
+post_bodies = {}
+
+
+# Fields of a stored user that are safe to return to clients
+PUBLIC_USER_FIELDS = ("id", "email", "username", "is_active", "created_at", "updated_at")
+
+
+def public_user(user):
+    """Project a stored user onto the fields exposed by the API"""
+    return {field: user[field] for field in PUBLIC_USER_FIELDS}
+
+
+# Current UTC time as an ISO string, refreshed once a second by tick_clock()
+_now_iso = datetime.utcnow().replace(microsecond=0).isoformat()
+
+
+def now_iso():
+    """Timestamp for new and updated records (one second resolution)"""
+    return _now_iso
+
+
+def add_post(post_data, author):
+    """Store a new post by author, assigning its id and timestamps"""
+    global post_id_counter
+    post_id_counter += 1
+    
+    post_data["id"] = post_id_counter
+    post_data["author_id"] = author["id"]
+    post_data["author"] = public_user(author)
+    post_data["created_at"] = post_data["updated_at"] = now_iso()
+    
+    posts[post_id_counter] = post_data
+    if post_data["is_published"]:
+        # Ids only grow, so appending keeps the index sorted
+        published_ids.append(post_id_counter)
+    return post_data
+
+
+async def tick_clock():
+    """Refresh the cached timestamp once a second until cancelled"""
+    global _now_iso
+    while True:
+        _now_iso = datetime.utcnow().replace(microsecond=0).isoformat()
+        await asyncio.sleep(1)
@@ -1,4 +1,9 @@
 from .auth import create_access_token, get_current_user, verify_password, get_password_hash
-from .database import get_db
+from ..database import get_db
+from .prefer import prefer_minimal
+from .body import json_body, msgspec_body, openapi_body
 
-__all__ = ["create_access_token", "get_current_user", "verify_password", "get_password_hash", "get_db"] 
\ No newline at end of file
+__all__ = [
+    "create_access_token", "get_current_user", "verify_password", "get_password_hash", "get_db",
+    "prefer_minimal", "json_body", "msgspec_body", "openapi_body"
+]
\ No newline at end of file
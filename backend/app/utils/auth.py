@@ -1,6 +1,9 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import hashlib
+import threading
 from typing import Optional
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -8,16 +11,51 @@ from ..config import settings
 from ..database import get_db
 from ..storage import users
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing: argon2id for new hashes, bcrypt kept to verify existing ones
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__time_cost=2,
+    argon2__memory_cost=19 * 1024,
+    argon2__parallelism=1,
+)
 
-# JWT token scheme
-security = HTTPBearer()
+# Recent verify results keyed by (sha256(password), stored hash), so repeated
+# attempts with the same credentials skip the KDF. Per-process memory only,
+# never persisted. Keying on the stored hash means a password change can't
+# hit a stale entry; the trade-off is that an unsalted SHA-256 of recently
+# tried passwords sits in memory, bounded to the most recently used entries.
+_verify_cache = OrderedDict()
+_VERIFY_CACHE_SIZE = 1024
+# verify_password runs on threadpool workers; the lock covers the cache
+# bookkeeping only, never the KDF itself
+_verify_cache_lock = threading.Lock()
+
+# JWT token scheme; missing credentials are rejected in get_current_user with
+# a 401, where HTTPBearer's own check would answer 403
+security = HTTPBearer(auto_error=False)
+
+# Build the signing key once instead of on every encode/decode
+_jwt_key = jwk.construct(settings.jwt_secret, settings.jwt_algorithm)
+_jwt_algorithms = [settings.jwt_algorithm]
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verify a password against its hash, reusing recent results"""
+    key = (hashlib.sha256(plain_password.encode()).digest(), hashed_password)
+    with _verify_cache_lock:
+        result = _verify_cache.get(key)
+        if result is not None:
+            # Least recently used entries are evicted first
+            _verify_cache.move_to_end(key)
+            return result
+    
+    result = pwd_context.verify(plain_password, hashed_password)
+    with _verify_cache_lock:
+        _verify_cache[key] = result
+        if len(_verify_cache) > _VERIFY_CACHE_SIZE:
+            _verify_cache.popitem(last=False)
+    return result
 
 
 def get_password_hash(password: str) -> str:
@@ -34,15 +72,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.jwt_expiration)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.jwt_secret, algorithm=settings.jwt_algorithm)
+    encoded_jwt = jwt.encode(to_encode, _jwt_key, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db=Depends(get_db)
 ) -> dict:
     """Get the current authenticated user"""
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -52,8 +97,8 @@ def get_current_user(
     try:
         payload = jwt.decode(
             credentials.credentials, 
-            settings.jwt_secret, 
-            algorithms=[settings.jwt_algorithm]
+            _jwt_key, 
+            algorithms=_jwt_algorithms
         )
         email: str = payload.get("sub")
         if email is None:
@@ -68,7 +113,7 @@ def get_current_user(
     return user
 
 
-def get_current_active_user(current_user: dict = Depends(get_current_user)) -> dict:
+async def get_current_active_user(current_user: dict = Depends(get_current_user)) -> dict:
     """Get the current active user"""
     if not current_user["is_active"]:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -0,0 +1,103 @@
+import re
+import msgspec
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from ..config import settings
+
+
+# msgspec reports where an error happened as a suffix like " - at `$.title`"
+_ERROR_AT = re.compile(r"^(?P<msg>.*?)(?: - at `\$(?P<path>[^`]*)`)?$", re.DOTALL)
+_PATH_PART = re.compile(r"\.([^.\[]+)|\[([^\]]*)\]")
+_MISSING_FIELD = re.compile(r"^Object missing required field `(?P<field>[^`]+)`$")
+_STR_LENGTH = re.compile(r"^Expected `str` of length (?P<op>>=|<=) (?P<limit>\d+)$")
+_WRONG_TYPE = re.compile(r"^Expected `(?P<expected>\w+)`, got `\w+`$")
+
+# msgspec type names -> the pydantic error type and message for them, so both
+# body parsers report errors the same way
+_TYPE_ERRORS = {
+    "str": ("string_type", "Input should be a valid string"),
+    "bool": ("bool_type", "Input should be a valid boolean"),
+    "int": ("int_type", "Input should be a valid integer"),
+    "float": ("float_type", "Input should be a valid number"),
+    "array": ("list_type", "Input should be a valid list"),
+    "object": ("model_type", "Input should be an object"),
+}
+
+
+def _msgspec_error(exc: msgspec.ValidationError) -> dict:
+    """Turn a msgspec validation error into a FastAPI-style error entry"""
+    match = _ERROR_AT.match(str(exc))
+    loc = ["body"]
+    for field, index in _PATH_PART.findall(match["path"] or ""):
+        loc.append(field or (int(index) if index.isdigit() else index))
+    
+    msg = match["msg"]
+    
+    missing = _MISSING_FIELD.match(msg)
+    if missing:
+        return {"type": "missing", "loc": (*loc, missing["field"]), "msg": "Field required", "input": None}
+    
+    length = _STR_LENGTH.match(msg)
+    if length:
+        limit = int(length["limit"])
+        characters = "character" if limit == 1 else "characters"
+        if length["op"] == ">=":
+            error_type, bound, ctx_key = "string_too_short", "at least", "min_length"
+        else:
+            error_type, bound, ctx_key = "string_too_long", "at most", "max_length"
+        return {
+            "type": error_type,
+            "loc": tuple(loc),
+            "msg": f"String should have {bound} {limit} {characters}",
+            "input": None,
+            "ctx": {ctx_key: limit}
+        }
+    
+    wrong_type = _WRONG_TYPE.match(msg)
+    if wrong_type and wrong_type["expected"] in _TYPE_ERRORS:
+        error_type, msg = _TYPE_ERRORS[wrong_type["expected"]]
+        return {"type": error_type, "loc": tuple(loc), "msg": msg, "input": None}
+    
+    return {"type": "value_error", "loc": tuple(loc), "msg": msg, "input": None}
+
+
+def openapi_body(model):
+    """OpenAPI request body for routes that parse their JSON body themselves"""
+    # The schema is only served in debug, so don't build it otherwise
+    if not settings.debug:
+        return None
+    return {"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": model.model_json_schema()}}
+    }}
+
+
+def json_body(model):
+    """Build a dependency that validates the raw JSON body with model_validate_json"""
+    async def dependency(request: Request):
+        try:
+            return model.model_validate_json(await request.body())
+        except ValidationError as exc:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in exc.errors(include_url=False)]
+            )
+    
+    return dependency
+
+
+def msgspec_body(struct_type):
+    """Build a dependency that decodes the JSON body straight into a msgspec Struct"""
+    decoder = msgspec.json.Decoder(struct_type)
+    
+    async def dependency(request: Request):
+        try:
+            return decoder.decode(await request.body())
+        except msgspec.ValidationError as exc:
+            raise RequestValidationError([_msgspec_error(exc)])
+        except msgspec.DecodeError as exc:
+            raise RequestValidationError(
+                [{"type": "json_invalid", "loc": ("body",), "msg": str(exc), "input": None}]
+            )
+    
+    return dependency
@@ -1,11 +0,0 @@
-from sqlalchemy.orm import Session
-from ..database import SessionLocal
-
-
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close() 
\ No newline at end of file
@@ -0,0 +1,14 @@
+from typing import Optional
+from fastapi import Header
+
+
+async def prefer_minimal(prefer: Optional[str] = Header(None)) -> bool:
+    """Check whether the client sent `Prefer: return=minimal` (RFC 7240)"""
+    if not prefer:
+        return False
+    for preference in prefer.split(","):
+        # Drop parameters ("; ...") and optional quotes around the value
+        name, _, value = preference.split(";", 1)[0].partition("=")
+        if name.strip().lower() == "return" and value.strip().strip('"').lower() == "minimal":
+            return True
+    return False
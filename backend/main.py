@@ -1,11 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
 import os
 from app.config import settings
 from app.database import Base
+from app.storage import tick_clock
 from app.routes import auth_router, posts_router, users_router
 
 
@@ -17,12 +20,16 @@ async def lifespan(app: FastAPI):
     
     # Create uploads directory if it doesn't exist
     os.makedirs("uploads", exist_ok=True)
+    
+    # Keep the cached record timestamp current
+    clock = asyncio.create_task(tick_clock())
     print("Application started successfully!")
     
     yield
     
     # Shutdown
     print("Shutting down application...")
+    clock.cancel()
 
 
 # Create FastAPI app
@@ -30,8 +37,11 @@ app = FastAPI(
     title="Blog API",
     description="A full-stack blog application API built with FastAPI",
     version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc",
+    # OpenAPI schema generation and the docs UIs only run in debug
+    docs_url="/docs" if settings.debug else None,
+    redoc_url="/redoc" if settings.debug else None,
+    openapi_url="/openapi.json" if settings.debug else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -66,8 +76,8 @@ async def root():
     return {
         "message": "Welcome to the Blog API",
         "version": "1.0.0",
-        "docs": "/docs",
-        "redoc": "/redoc"
+        "docs": app.docs_url,
+        "redoc": app.redoc_url
     }
 
 
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import httpx
+import pytest
+import pytest_asyncio
+from passlib.context import CryptContext
+
+# main.py mounts the uploads directory at import time, before its lifespan
+# gets a chance to create it
+os.makedirs("uploads", exist_ok=True)
+
+from main import app
+from app.storage import users, usernames, posts, published_ids, post_bodies, now_iso
+from app.utils import auth as auth_utils
+
+try:
+    # Comes with uvicorn[standard] everywhere except Windows
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """One event loop for the run, so the shared clients outlive single tests"""
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fast_password_hashing():
+    """Hash test passwords at the lowest argon2 cost; tests don't exercise KDF strength"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(auth_utils, "pwd_context", CryptContext(
+            schemes=["argon2"],
+            argon2__time_cost=1,
+            argon2__memory_cost=8,
+            argon2__parallelism=1,
+        ))
+        yield
+
+
+@pytest_asyncio.fixture(scope="session")
+async def client():
+    """Test client fixture, started once for the whole run"""
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test"
+        ) as c:
+            yield c
+
+
+@pytest.fixture(autouse=True)
+def clean_storage():
+    """Clear the in-memory storage before each test"""
+    users.clear()
+    usernames.clear()
+    posts.clear()
+    published_ids.clear()
+    post_bodies.clear()
+
+
+@pytest.fixture(scope="session")
+def test_user():
+    """Test user fixture"""
+    return {
+        "email": "test@example.com",
+        "username": "testuser",
+        "password": "testpassword123"
+    }
+
+
+@pytest.fixture(scope="session")
+def registered_user(test_user):
+    """Build the stored test user and mint its token once, bypassing the API"""
+    timestamp = now_iso()
+    user = {
+        "id": 1,
+        "email": test_user["email"],
+        "username": test_user["username"],
+        "hashed_password": auth_utils.get_password_hash(test_user["password"]),
+        "is_active": True,
+        "created_at": timestamp,
+        "updated_at": timestamp
+    }
+    token = auth_utils.create_access_token({"sub": user["email"]})
+    return user, {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def auth_headers(registered_user):
+    """Get authentication headers"""
+    # Put the registered user back after storage was cleared
+    user, headers = registered_user
+    users[user["email"]] = dict(user)
+    usernames[user["username"]] = user["email"]
+    return headers
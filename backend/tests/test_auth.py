@@ -1,30 +1,16 @@
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
-from app.storage import users
-
-@pytest.fixture
-def client():
-    """Test client fixture"""
-    # Clear the in-memory storage before each test
-    users.clear()
-    with TestClient(app) as c:
-        yield c
-
-
-@pytest.fixture
-def test_user():
-    """Test user fixture"""
-    return {
-        "email": "test@example.com",
-        "username": "testuser",
-        "password": "testpassword123"
-    }
-
-
-def test_signup_success(client, test_user):
+from app.routes import auth as auth_routes
+from app.utils import auth as auth_utils
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_signup_success(client, test_user):
     """Test successful user signup"""
-    response = client.post("/api/auth/signup", json=test_user)
+    response = await client.post("/api/auth/signup", json=test_user)
     assert response.status_code == 200
     data = response.json()
     assert data["email"] == test_user["email"]
@@ -33,24 +19,72 @@ def test_signup_success(client, test_user):
     assert "hashed_password" not in data
 
 
-def test_signup_duplicate_email(client, test_user):
+async def test_signup_prefer_minimal(client, test_user):
+    """Test signup with Prefer: return=minimal"""
+    response = await client.post(
+        "/api/auth/signup",
+        json=test_user,
+        headers={"Prefer": "return=minimal"}
+    )
+    assert response.status_code == 201
+    assert response.content == b""
+    assert response.headers["Preference-Applied"] == "return=minimal"
+
+
+async def test_signup_duplicate_skips_hash(client, test_user, monkeypatch):
+    """Test that a duplicate signup is rejected before the password is hashed"""
+    await client.post("/api/auth/signup", json=test_user)
+    
+    hashed = []
+    monkeypatch.setattr(auth_routes, "get_password_hash", hashed.append)
+    response = await client.post("/api/auth/signup", json=test_user)
+    assert response.status_code == 400
+    assert hashed == []
+
+
+@pytest.mark.parametrize("body,loc,error_type", [
+    (b'{"email": "test@example.com", "username": "testuser"}', ["body", "password"], "missing"),
+    (b'{"email": ', ["body"], "json_invalid"),
+], ids=["missing-password", "malformed"])
+async def test_signup_invalid_body(client, body, loc, error_type):
+    """Test that signup body errors point at the offending field"""
+    response = await client.post("/api/auth/signup", content=body)
+    assert response.status_code == 422
+    error = response.json()["detail"][0]
+    assert error["loc"] == loc
+    assert error["type"] == error_type
+
+
+async def test_signup_duplicate_email(client, test_user):
     """Test signup with duplicate email"""
     # First signup
-    client.post("/api/auth/signup", json=test_user)
+    await client.post("/api/auth/signup", json=test_user)
     
     # Second signup with same email
-    response = client.post("/api/auth/signup", json=test_user)
+    response = await client.post("/api/auth/signup", json=test_user)
     assert response.status_code == 400
     assert "Email already registered" in response.json()["detail"]
 
 
-def test_login_success(client, test_user):
+async def test_signup_duplicate_username(client, test_user):
+    """Test signup with duplicate username"""
+    # First signup
+    await client.post("/api/auth/signup", json=test_user)
+    
+    # Second signup with same username but a different email
+    duplicate_user = {**test_user, "email": "other@example.com"}
+    response = await client.post("/api/auth/signup", json=duplicate_user)
+    assert response.status_code == 400
+    assert "Username already taken" in response.json()["detail"]
+
+
+async def test_login_success(client, test_user):
     """Test successful login"""
     # Create user first
-    client.post("/api/auth/signup", json=test_user)
+    await client.post("/api/auth/signup", json=test_user)
     
     # Login
-    response = client.post("/api/auth/login", data={
+    response = await client.post("/api/auth/login", data={
         "username": test_user["email"],
         "password": test_user["password"]
     })
@@ -60,13 +94,13 @@ def test_login_success(client, test_user):
     assert data["token_type"] == "bearer"
 
 
-def test_login_invalid_credentials(client, test_user):
+async def test_login_invalid_credentials(client, test_user):
     """Test login with invalid credentials"""
     # Create user first
-    client.post("/api/auth/signup", json=test_user)
+    await client.post("/api/auth/signup", json=test_user)
     
     # Login with wrong password
-    response = client.post("/api/auth/login", data={
+    response = await client.post("/api/auth/login", data={
         "username": test_user["email"],
         "password": "wrongpassword"
     })
@@ -74,18 +108,18 @@ def test_login_invalid_credentials(client, test_user):
     assert "Incorrect email or password" in response.json()["detail"]
 
 
-def test_protected_route_unauthorized(client):
+async def test_protected_route_unauthorized(client):
     """Test accessing protected route without authentication"""
-    response = client.get("/api/users/me")
+    response = await client.get("/api/users/me")
     assert response.status_code == 401
     assert "Not authenticated" in response.json()["detail"]
 
 
-def test_protected_route_authorized(client, test_user):
+async def test_protected_route_authorized(client, test_user):
     """Test accessing protected route with authentication"""
     # Create user and get token
-    client.post("/api/auth/signup", json=test_user)
-    login_response = client.post("/api/auth/login", data={
+    await client.post("/api/auth/signup", json=test_user)
+    login_response = await client.post("/api/auth/login", data={
         "username": test_user["email"],
         "password": test_user["password"]
     })
@@ -93,8 +127,58 @@ def test_protected_route_authorized(client, test_user):
     
     # Access protected route
     headers = {"Authorization": f"Bearer {token}"}
-    response = client.get("/api/users/me", headers=headers)
+    response = await client.get("/api/users/me", headers=headers)
     assert response.status_code == 200
     data = response.json()
     assert data["email"] == test_user["email"]
-    assert data["username"] == test_user["username"]
\ No newline at end of file
+    assert data["username"] == test_user["username"]
+
+
+async def test_verify_password_cache(monkeypatch):
+    """Test that repeated verifies skip the KDF and evict the least recently used"""
+    monkeypatch.setattr(auth_utils, "_verify_cache", type(auth_utils._verify_cache)())
+    monkeypatch.setattr(auth_utils, "_VERIFY_CACHE_SIZE", 2)
+    hashes = {password: auth_utils.get_password_hash(password) for password in ("first", "second", "third")}
+    calls = []
+    verify = auth_utils.pwd_context.verify
+    
+    def counting_verify(password, hashed_password):
+        calls.append(password)
+        return verify(password, hashed_password)
+    
+    monkeypatch.setattr(auth_utils.pwd_context, "verify", counting_verify)
+    
+    assert auth_utils.verify_password("first", hashes["first"])
+    assert auth_utils.verify_password("second", hashes["second"])
+    assert auth_utils.verify_password("first", hashes["first"])
+    assert calls == ["first", "second"]
+    
+    # "second" is now the least recently used, so it goes first
+    assert auth_utils.verify_password("third", hashes["third"])
+    assert auth_utils.verify_password("first", hashes["first"])
+    assert auth_utils.verify_password("second", hashes["second"])
+    assert calls == ["first", "second", "third", "second"]
+
+
+class SlowCache(OrderedDict):
+    """Verify cache that pauses after each lookup, as a preempted thread would"""
+    
+    def get(self, key, default=None):
+        value = super().get(key, default)
+        time.sleep(0.0001)
+        return value
+
+
+async def test_verify_password_cache_threads(monkeypatch):
+    """Test that concurrent verifies don't trip over each other's evictions"""
+    monkeypatch.setattr(auth_utils, "_verify_cache", SlowCache())
+    monkeypatch.setattr(auth_utils, "_VERIFY_CACHE_SIZE", 2)
+    monkeypatch.setattr(auth_utils.pwd_context, "verify", lambda password, hashed_password: True)
+    
+    def worker(n):
+        for i in range(200):
+            assert auth_utils.verify_password(f"password{(n + i) % 4}", "hash")
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for future in [pool.submit(worker, n) for n in range(8)]:
+            future.result()
@@ -1,28 +1,7 @@
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
-from app.storage import users, posts, post_id_counter
+from app.storage import users, published_ids, add_post
 
-@pytest.fixture
-def client():
-    """Test client fixture"""
-    # Clear the in-memory storage before each test
-    users.clear()
-    posts.clear()
-    global post_id_counter
-    post_id_counter = 0
-    with TestClient(app) as c:
-        yield c
-
-
-@pytest.fixture
-def test_user():
-    """Test user fixture"""
-    return {
-        "email": "test@example.com",
-        "username": "testuser",
-        "password": "testpassword123"
-    }
+pytestmark = pytest.mark.asyncio
 
 
 @pytest.fixture
@@ -36,37 +15,54 @@ def test_post():
 
 
 @pytest.fixture
-def auth_headers(client, test_user):
-    """Get authentication headers"""
-    # Create user and get token
-    client.post("/api/auth/signup", json=test_user)
-    login_response = client.post("/api/auth/login", data={
-        "username": test_user["email"],
-        "password": test_user["password"]
-    })
-    token = login_response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
-
-
-def test_get_posts_empty(client):
+def post_factory(auth_headers, test_user, test_post):
+    """Insert posts by the test user straight into storage, bypassing the API"""
+    author = users[test_user["email"]]
+    
+    def make_post(**fields):
+        return add_post({**test_post, **fields}, author)
+    
+    return make_post
+
+
+@pytest.fixture
+def bulk_posts(auth_headers, test_user):
+    """Insert 15 published posts straight into storage, bypassing the API"""
+    author = users[test_user["email"]]
+    for i in range(15):
+        add_post({
+            "title": f"Post {i}",
+            "content": f"Content for post {i}",
+            "is_published": True
+        }, author)
+
+
+async def test_get_posts_empty(client):
     """Test getting posts when none exist"""
-    response = client.get("/api/posts/")
+    response = await client.get("/api/posts/")
     assert response.status_code == 200
     data = response.json()
     assert data["posts"] == []
     assert data["total"] == 0
 
 
-def test_create_post_unauthorized(client, test_post):
-    """Test creating post without authentication"""
-    response = client.post("/api/posts/", json=test_post)
-    assert response.status_code == 401
-    assert "Not authenticated" in response.json()["detail"]
+@pytest.mark.parametrize("method,path,expected,detail", [
+    ("POST", "/api/posts/", 401, "Not authenticated"),
+    ("PUT", "/api/posts/1", 401, "Not authenticated"),
+    ("DELETE", "/api/posts/1", 401, "Not authenticated"),
+    ("GET", "/api/posts/999", 404, "Post not found"),
+], ids=["create-noauth", "update-noauth", "delete-noauth", "get-missing"])
+async def test_auth_matrix(client, method, path, expected, detail):
+    """Test the auth gate and missing-post responses across endpoints"""
+    # An invalid body must not get past the auth check
+    response = await client.request(method, path, content=b"{not json")
+    assert response.status_code == expected
+    assert detail in response.json()["detail"]
 
 
-def test_create_post_authorized(client, test_post, auth_headers):
+async def test_create_post_authorized(client, test_post, auth_headers):
     """Test creating post with authentication"""
-    response = client.post("/api/posts/", json=test_post, headers=auth_headers)
+    response = await client.post("/api/posts/", json=test_post, headers=auth_headers)
     assert response.status_code == 201
     data = response.json()
     assert data["title"] == test_post["title"]
@@ -76,103 +72,192 @@ def test_create_post_authorized(client, test_post, auth_headers):
     assert "author" in data
 
 
-def test_get_post_by_id(client, test_post, auth_headers):
-    """Test getting a specific post by ID"""
-    # Create post first
-    create_response = client.post("/api/posts/", json=test_post, headers=auth_headers)
-    post_id = create_response.json()["id"]
+@pytest.mark.parametrize("body,loc,error_type", [
+    (b'{"title": "ab", "content": "This is a test post content."}', ["body", "title"], "string_too_short"),
+    (b'{"title": 3, "content": "This is a test post content."}', ["body", "title"], "string_type"),
+    (b'{"title": "Test Post"}', ["body", "content"], "missing"),
+    (b'{"title": "Test Post", ', ["body"], "json_invalid"),
+], ids=["short-title", "title-type", "missing-content", "malformed"])
+async def test_create_post_invalid_body(client, auth_headers, body, loc, error_type):
+    """Test that create body errors point at the offending field"""
+    response = await client.post("/api/posts/", content=body, headers=auth_headers)
+    assert response.status_code == 422
+    error = response.json()["detail"][0]
+    assert error["loc"] == loc
+    assert error["type"] == error_type
+
+
+@pytest.mark.parametrize("prefer", [
+    "return=minimal",
+    "return=minimal; foo",
+    'respond-async, return="minimal"',
+])
+async def test_create_post_prefer_minimal(client, test_post, auth_headers, prefer):
+    """Test creating post with Prefer: return=minimal"""
+    headers = {**auth_headers, "Prefer": prefer}
+    response = await client.post("/api/posts/", json=test_post, headers=headers)
+    assert response.status_code == 201
+    data = response.json()
+    assert list(data) == ["id"]
     
-    # Get the post
-    response = client.get(f"/api/posts/{post_id}")
+    # The post is stored in full
+    get_response = await client.get(f"/api/posts/{data['id']}")
+    assert get_response.json()["title"] == test_post["title"]
+
+
+async def test_create_post_after_factory(client, test_post, auth_headers, post_factory):
+    """Test that posts created through the API don't reuse factory ids"""
+    post = post_factory()
+    response = await client.post("/api/posts/", json=test_post, headers=auth_headers)
+    assert response.status_code == 201
+    assert response.json()["id"] != post["id"]
+    assert published_ids == [post["id"], response.json()["id"]]
+
+
+async def test_get_post_by_id(client, test_post, post_factory):
+    """Test getting a specific post by ID"""
+    post = post_factory()
+    response = await client.get(f"/api/posts/{post['id']}")
     assert response.status_code == 200
     data = response.json()
-    assert data["id"] == post_id
+    assert data["id"] == post["id"]
     assert data["title"] == test_post["title"]
 
 
-def test_get_post_not_found(client):
-    """Test getting a non-existent post"""
-    response = client.get("/api/posts/999")
-    assert response.status_code == 404
-    assert "Post not found" in response.json()["detail"]
+async def test_get_post_after_update(client, test_post, auth_headers, post_factory):
+    """Test that a fetched post reflects later updates"""
+    post = post_factory()
+    assert (await client.get(f"/api/posts/{post['id']}")).json()["title"] == test_post["title"]
+    
+    # Update and fetch again
+    await client.put(f"/api/posts/{post['id']}", json={"title": "Updated Title"}, headers=auth_headers)
+    response = await client.get(f"/api/posts/{post['id']}")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Updated Title"
 
 
-def test_update_post_unauthorized(client, test_post, auth_headers):
-    """Test updating post without authentication"""
-    # Create post first
-    create_response = client.post("/api/posts/", json=test_post, headers=auth_headers)
-    post_id = create_response.json()["id"]
-    
-    # Try to update without auth
-    update_data = {"title": "Updated Title"}
-    response = client.put(f"/api/posts/{post_id}", json=update_data)
-    assert response.status_code == 401
+@pytest.mark.parametrize("body,loc,error_type", [
+    (b'{"title": "ab"}', ["body", "title"], "string_too_short"),
+    (b'{"title": ', ["body"], "json_invalid"),
+], ids=["short-title", "malformed"])
+async def test_update_post_invalid_body(client, auth_headers, post_factory, body, loc, error_type):
+    """Test that update body errors point at the offending field"""
+    post = post_factory()
+    response = await client.put(f"/api/posts/{post['id']}", content=body, headers=auth_headers)
+    assert response.status_code == 422
+    error = response.json()["detail"][0]
+    assert error["loc"] == loc
+    assert error["type"] == error_type
 
 
-def test_update_post_authorized(client, test_post, auth_headers):
-    """Test updating post with authentication"""
-    # Create post first
-    create_response = client.post("/api/posts/", json=test_post, headers=auth_headers)
-    post_id = create_response.json()["id"]
-    
-    # Update the post
+@pytest.mark.parametrize("method,expected", [
+    ("PUT", 200),
+    ("DELETE", 204),
+])
+async def test_modify_post(client, auth_headers, post_factory, method, expected):
+    """Test updating and deleting a post with authentication"""
+    post = post_factory()
     update_data = {"title": "Updated Title", "content": "Updated content"}
-    response = client.put(f"/api/posts/{post_id}", json=update_data, headers=auth_headers)
+    response = await client.request(
+        method,
+        f"/api/posts/{post['id']}",
+        json=update_data if method == "PUT" else None,
+        headers=auth_headers
+    )
+    assert response.status_code == expected
+    
+    if expected == 200:
+        data = response.json()
+        assert data["title"] == "Updated Title"
+        assert data["content"] == "Updated content"
+    elif expected == 204:
+        # Verify post is deleted
+        get_response = await client.get(f"/api/posts/{post['id']}")
+        assert get_response.status_code == 404
+
+
+async def listed_ids(client):
+    """Ids of the posts the public listing returns"""
+    response = await client.get("/api/posts/")
+    return [post["id"] for post in response.json()["posts"]]
+
+
+async def test_unpublish_post(client, auth_headers, post_factory):
+    """Test that unpublishing a post drops it from the listing"""
+    first, second, third = post_factory(), post_factory(), post_factory()
+    response = await client.put(
+        f"/api/posts/{second['id']}", json={"is_published": False}, headers=auth_headers
+    )
     assert response.status_code == 200
-    data = response.json()
-    assert data["title"] == "Updated Title"
-    assert data["content"] == "Updated content"
+    assert await listed_ids(client) == [first["id"], third["id"]]
+    assert (await client.get(f"/api/posts/{second['id']}")).status_code == 404
 
 
-def test_delete_post_unauthorized(client, test_post, auth_headers):
-    """Test deleting post without authentication"""
-    # Create post first
-    create_response = client.post("/api/posts/", json=test_post, headers=auth_headers)
-    post_id = create_response.json()["id"]
-    
-    # Try to delete without auth
-    response = client.delete(f"/api/posts/{post_id}")
-    assert response.status_code == 401
+async def test_publish_post(client, auth_headers, post_factory):
+    """Test that publishing a draft puts it back in id order"""
+    first = post_factory()
+    draft = post_factory(is_published=False)
+    third = post_factory()
+    response = await client.put(
+        f"/api/posts/{draft['id']}", json={"is_published": True}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert await listed_ids(client) == [first["id"], draft["id"], third["id"]]
 
 
-def test_delete_post_authorized(client, test_post, auth_headers):
-    """Test deleting post with authentication"""
-    # Create post first
-    create_response = client.post("/api/posts/", json=test_post, headers=auth_headers)
-    post_id = create_response.json()["id"]
-    
-    # Delete the post
-    response = client.delete(f"/api/posts/{post_id}", headers=auth_headers)
+async def test_delete_published_post(client, auth_headers, post_factory):
+    """Test that deleting a published post drops it from the listing"""
+    first, second = post_factory(), post_factory()
+    response = await client.delete(f"/api/posts/{first['id']}", headers=auth_headers)
     assert response.status_code == 204
-    
-    # Verify post is deleted
-    get_response = client.get(f"/api/posts/{post_id}")
-    assert get_response.status_code == 404
+    assert await listed_ids(client) == [second["id"]]
 
 
-def test_posts_pagination(client, auth_headers):
+@pytest.mark.parametrize("published", [True, False])
+async def test_update_post_null_is_published(client, auth_headers, post_factory, published):
+    """Test that is_published can't be set to null"""
+    post_factory()
+    post = post_factory(is_published=published)
+    post_factory()
+    before = await listed_ids(client)
+    response = await client.put(
+        f"/api/posts/{post['id']}", json={"is_published": None}, headers=auth_headers
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "is_published"]
+    assert await listed_ids(client) == before
+
+
+@pytest.mark.parametrize("skip,limit,expected_len,expected_page", [
+    (0, 10, 10, 1),
+    (10, 10, 5, 2),
+    (0, 5, 5, 1),
+    (5, 5, 5, 2),
+])
+async def test_posts_pagination(client, bulk_posts, skip, limit, expected_len, expected_page):
     """Test posts pagination"""
-    # Create multiple posts
-    for i in range(15):
-        post_data = {
-            "title": f"Post {i}",
-            "content": f"Content for post {i}",
-            "is_published": True
-        }
-        client.post("/api/posts/", json=post_data, headers=auth_headers)
-    
-    # Test pagination
-    response = client.get("/api/posts/?skip=0&limit=10")
+    response = await client.get(f"/api/posts/?skip={skip}&limit={limit}")
     assert response.status_code == 200
     data = response.json()
-    assert len(data["posts"]) == 10
+    assert len(data["posts"]) == expected_len
     assert data["total"] == 15
-    assert data["page"] == 1
-    assert data["per_page"] == 10
+    assert data["page"] == expected_page
+    assert data["per_page"] == limit
+
+
+async def test_posts_keyset_pagination(client, bulk_posts):
+    """Test posts pagination with an after_id cursor"""
+    # First page hands back a cursor to the next one
+    response = await client.get("/api/posts/?limit=10")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["posts"]) == 10
+    assert data["next_cursor"] == data["posts"][-1]["id"]
     
-    # Test second page
-    response = client.get("/api/posts/?skip=10&limit=10")
+    # Second page starts right after the cursor
+    response = await client.get(f"/api/posts/?limit=10&after_id={data['next_cursor']}")
     assert response.status_code == 200
     data = response.json()
     assert len(data["posts"]) == 5
-    assert data["page"] == 2
\ No newline at end of file
+    assert data["posts"][0]["title"] == "Post 10"
+    assert data["next_cursor"] is None
@@ -0,0 +1,126 @@
+import pytest
+from app.routes import users as users_routes
+from app.storage import users, usernames
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def other_user():
+    """A second user, distinct from test_user"""
+    return {
+        "email": "other@example.com",
+        "username": "otheruser",
+        "password": "otherpassword123"
+    }
+
+
+async def test_get_profile(client, test_user, auth_headers):
+    """Test getting the current user's profile"""
+    response = await client.get("/api/users/me", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["email"] == test_user["email"]
+    assert "hashed_password" not in data
+
+
+async def test_update_username_taken(client, test_user, other_user, auth_headers):
+    """Test renaming to a username that belongs to someone else"""
+    await client.post("/api/auth/signup", json=other_user)
+    
+    response = await client.put(
+        "/api/users/me", json={"username": other_user["username"]}, headers=auth_headers
+    )
+    assert response.status_code == 400
+    assert "Username already taken" in response.json()["detail"]
+    assert usernames[test_user["username"]] == test_user["email"]
+
+
+async def test_update_username_taken_skips_hash(client, other_user, auth_headers, monkeypatch):
+    """Test that a taken username is rejected before a new password is hashed"""
+    await client.post("/api/auth/signup", json=other_user)
+    
+    hashed = []
+    monkeypatch.setattr(users_routes, "get_password_hash", hashed.append)
+    response = await client.put(
+        "/api/users/me",
+        json={"username": other_user["username"], "password": "newpassword123"},
+        headers=auth_headers
+    )
+    assert response.status_code == 400
+    assert hashed == []
+
+
+async def test_update_username_frees_old_name(client, test_user, other_user, auth_headers):
+    """Test that a renamed user's old username can be signed up again"""
+    response = await client.put("/api/users/me", json={"username": "renamed"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["username"] == "renamed"
+    assert test_user["username"] not in usernames
+    
+    # The old username is free for a new signup
+    response = await client.post(
+        "/api/auth/signup", json={**other_user, "username": test_user["username"]}
+    )
+    assert response.status_code == 200
+
+
+async def test_update_email(client, test_user, auth_headers):
+    """Test that an email change re-keys the user and the username index"""
+    response = await client.put(
+        "/api/users/me", json={"email": "new@example.com"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["email"] == "new@example.com"
+    assert test_user["email"] not in users
+    assert users["new@example.com"]["username"] == test_user["username"]
+    assert usernames[test_user["username"]] == "new@example.com"
+
+
+async def test_update_email_refreshes_token(client, test_user, auth_headers):
+    """Test that an email change hands back a token for the new email"""
+    response = await client.put(
+        "/api/users/me", json={"email": "new@example.com"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    access_token = response.json()["access_token"]
+    
+    # The old token names the old email and no longer authenticates
+    response = await client.get("/api/users/me", headers=auth_headers)
+    assert response.status_code == 401
+    
+    response = await client.get(
+        "/api/users/me", headers={"Authorization": f"Bearer {access_token}"}
+    )
+    assert response.status_code == 200
+    assert response.json()["email"] == "new@example.com"
+
+
+async def test_update_without_email_keeps_token(client, auth_headers):
+    """Test that updates leaving the email alone don't issue a token"""
+    response = await client.put("/api/users/me", json={"username": "renamed"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["access_token"] is None
+    
+    response = await client.get("/api/users/me", headers=auth_headers)
+    assert response.status_code == 200
+
+
+async def test_update_password(client, test_user, auth_headers):
+    """Test logging in with a changed password"""
+    response = await client.put(
+        "/api/users/me", json={"password": "newpassword123"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    
+    response = await client.post("/api/auth/login", data={
+        "username": test_user["email"],
+        "password": "newpassword123"
+    })
+    assert response.status_code == 200
+    
+    response = await client.post("/api/auth/login", data={
+        "username": test_user["email"],
+        "password": test_user["password"]
+    })
+    assert response.status_code == 401
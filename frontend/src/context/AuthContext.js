@@ -90,7 +90,15 @@ export const AuthProvider = ({ children }) => {
   const updateProfile = async (userData) => {
     try {
       const response = await api.put('/api/users/me', userData);
-      setUser(response.data);
+      const { access_token, ...updatedUser } = response.data;
+
+      // Changing the email invalidates the old token, so switch to the new one
+      if (access_token) {
+        localStorage.setItem('token', access_token);
+        api.defaults.headers.common['Authorization'] = `Bearer ${access_token}`;
+      }
+
+      setUser(updatedUser);
       toast.success('Profile updated successfully!');
       return true;
     } catch (error) {